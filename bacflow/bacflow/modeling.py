@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable
 
 import numpy as np
 import pandas as pd
+from numba import njit, prange
 
 from bacflow.schemas import Drink, Model, Person, Sex
 
@@ -18,53 +21,39 @@ class UnsupportedModelException(Exception):
         return self.message
 
 
-def _F_calculate_body_factor(person: Person, model: str) -> float: ...
-    if person.sex == Sex.F and model not in simulation_F:
-        raise UnsupportedModelException(model, person.sex)
+_BODY_FACTOR_FNS: dict[tuple[Sex, Model], Callable[[int, float, float], float]] = {
+    (Sex.F, Model.Forrest): lambda age, height, weight: 0.8736 - 0.0124 * weight / height**2,
+    (Sex.F, Model.Seidl): lambda age, height, weight: 0.31223 - 0.006446 * weight + 0.4466 * height,
+    (Sex.F, Model.Widmark): lambda age, height, weight: 0.55,
+    (Sex.F, Model.Watson): lambda age, height, weight: 0.29218 + (12.666 * height - 2.4846) / weight,
+    (Sex.F, Model.average): lambda age, height, weight: 0.50766 + 0.11165 * height - weight * (0.001612 + 0.0031 / height**2) - (1 / weight) * (0.62115 - 3.1665 * height),
+    (Sex.M, Model.Forrest): lambda age, height, weight: 1.0178 - 0.012127 * weight / height**2,
+    (Sex.M, Model.Seidl): lambda age, height, weight: 0.31608 - 0.004821 * weight + 0.4632 * height,
+    (Sex.M, Model.Widmark): lambda age, height, weight: 0.68,
+    (Sex.M, Model.Watson): lambda age, height, weight: 0.39834 + (12.725 * height - 0.11275 * age + 2.8993) / weight,
+    (Sex.M, Model.average): lambda age, height, weight: 0.62544 + 0.13664 * height - weight * (0.00189 + 0.002425 / height**2) + (1 / weight) * (0.57986 + 2.545 * height - 0.02255 * age),
+    (Sex.M, Model.Ulrich): lambda age, height, weight: 0.715 - 0.00462 * weight + 0.22 * height,
+}
 
-    age, height, weight = person.age, person.height, person.weight
+_BODY_FACTOR_BOUNDS: dict[Sex, tuple[float, float]] = {Sex.F: (0.44, 0.8), Sex.M: (0.60, 0.87)}
 
-    match model:
-        case Model.Forrest:
-            r = 0.8736 - 0.0124 * weight / height**2
-        case Model.Seidl:
-            r = 0.31223 - 0.006446 * weight + 0.4466 * height
-        case Model.Widmark:
-            r = 0.55
-        case Model.Watson:
-            r = 0.29218 + (12.666 * height - 2.4846) / weight
-        case Model.average:
-            r = 0.50766 + 0.11165 * height - weight * (0.001612 + 0.0031 / height**2) - (1 / weight) * (0.62115 - 3.1665 * height)
 
-    return np.clip(r, 0.44, 0.8)
-
-
-def _M_calculate_body_factor(person: Person, model: str) -> float:
-    if person.sex == Sex.M and model not in simulation_M:
-        raise UnsupportedModelException(model, person.sex)
-
-    age, height, weight = person.age, person.height, person.weight
-
-    match model:
-        case Model.Forrest:
-            r = 1.0178 - 0.012127 * weight / height**2
-        case Model.Seidl:
-            r = 0.31608 - 0.004821 * weight + 0.4632 * height
-        case Model.Widmark:
-            r = 0.68
-        case Model.Watson:
-            r = 0.39834 + (12.725 * height - 0.11275 * age + 2.8993) / weight
-        case Model.average:
-            r = 0.62544 + 0.13664 * height - weight * (0.00189 + 0.002425 / height**2) + (1 / weight) * (0.57986 + 2.545 * height - 0.02255 * age)
-        case Model.Ulrich:
-            r = 0.715 - 0.00462 * weight + 0.22 * height
+@lru_cache(maxsize=128)
+def calculate_body_factor(person: Person, model: Model) -> float:
+    """body factor $r$ of subjects with a model of the Widmark family"""
+    if model == Model.Widmark:
+        # literal constants, independent of anthropometrics — skip the table
+        return 0.55 if person.sex == Sex.F else 0.68
 
-    return np.clip(r, 0.60, 0.87)
+    try:
+        fn = _BODY_FACTOR_FNS[(person.sex, model)]
+    except KeyError:
+        raise UnsupportedModelException(model, person.sex) from None
 
+    r = fn(person.age, person.height, person.weight)
+    lo, hi = _BODY_FACTOR_BOUNDS[person.sex]
 
-def calculate_body_factor(person: Person, model: str) -> float:
-    """body factor $r$ of subjects with a model of the Widmark family"""
-    return _M_calculate_body_factor(person, model) if person.sex == Sex.M else _F_calculate_body_factor(person, model)
+    return lo if r < lo else (hi if r > hi else r)
 
 
 def calc_aer(sex: Sex, bac: float) -> float:
@@ -80,39 +69,145 @@ def calc_aer(sex: Sex, bac: float) -> float:
     if sex == Sex.M:
         aer = 0.14 + (bac * 0.05)
 
-    aer = np.clip(aer, 0.009, 0.035)
+    return 0.009 if aer < 0.009 else (0.035 if aer > 0.035 else aer)
+
+
+@njit(cache=True, fastmath=True)
+def _bac_recurrence(be: np.ndarray, a0: float, dt_min: float) -> tuple[np.ndarray, np.ndarray]:
+    n = be.shape[0]
+    eliminated = np.empty(n)
+    bac = np.empty(n)
+    eliminated[0] = 0.0
+    bac[0] = be[0]
+
+    for i in range(1, n):
+        # dynamic AER from the previous BAC value, spread over a 1-minute interval
+        aer = a0 + bac[i - 1] * 0.05
+        aer = 0.009 if aer < 0.009 else (0.035 if aer > 0.035 else aer)
+        step = aer * dt_min
+        # we cannot eliminate more alcohol than has been absorbed so far
+        current_bac = be[i] - eliminated[i - 1]
+        eliminated[i] = eliminated[i - 1] + (current_bac if current_bac < step else step)
+        bac[i] = be[i] - eliminated[i]
+
+    return eliminated, bac
+
+
+# warm the JIT cache at import so the first simulation does not pay compile time
+_bac_recurrence(np.zeros(2), 0.14, 1 / 60)
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _bac_batch(be: np.ndarray, a0: np.ndarray, dt_min: float, eliminated: np.ndarray, bac: np.ndarray) -> None:
+    N, T = be.shape
+
+    for p in prange(N):
+        bac[p, 0] = be[p, 0]
+        for i in range(1, T):
+            aer = a0[p] + bac[p, i - 1] * 0.05
+            aer = 0.009 if aer < 0.009 else (0.035 if aer > 0.035 else aer)
+            step = aer * dt_min
+            # branchless clamp of the eliminated mass to [0, step]; LLVM lowers
+            # the ternary chain to min/max moves that vectorize across paths
+            x = be[p, i] - eliminated[p, i - 1]
+            x = 0.0 if x < 0.0 else x
+            x = step if x > step else x
+            eliminated[p, i] = eliminated[p, i - 1] + x
+            bac[p, i] = be[p, i] - eliminated[p, i]
+
+
+def _eliminate_const_aer(be: np.ndarray, step: float) -> np.ndarray:
+    """closed form of the elimination recurrence for a constant AER
+
+    With a constant per-minute step ``c`` the recurrence
+    ``eliminated[i] = eliminated[i-1] + min(be[i] - eliminated[i-1], c)``
+    rewrites to ``eliminated[i] = min(be[i], eliminated[i-1] + c)``, which
+    telescopes to ``c*i`` plus a running minimum of ``be - c*i`` — one
+    branchless minimum.accumulate instead of a sequential loop.
+    """
+    ramp = step * np.arange(be.shape[-1])
+    v = be - ramp
+    v[..., 0] = 0.0
 
-    return aer
+    return np.minimum.accumulate(v, axis=-1) + ramp
 
 
-def calculate_bac_for_model(
-    person: Person
-    absorption: pd.DataFrame, 
-    model: Model,
-    absorption_end_idx: int
-) -> tuple[pd.DataFrame, int]:
-    r = calculate_body_factor(person, model)
-
-    model_bac_ts = absorption.copy()
-    model_bac_ts['bac_excluding_elimination'] = model_bac_ts['kg_absorbed'] / (r * person.weight)
-    model_bac_ts['eliminated'] = 0.0 
+def batch_bac(be: np.ndarray, a0: np.ndarray, dt_min: float) -> tuple[np.ndarray, np.ndarray]:
+    """elimination recurrence over an (N paths, T minutes) absorption matrix
 
-    for i in range(1, len(model_bac_ts)):
-        # Available alcohol at current step (before elimination)
-        current_bac = model_bac_ts.at[i, 'bac_excluding_elimination'] - model_bac_ts.at[i-1, 'eliminated']
-        # Compute dynamic elimination rate using previous BAC value
-        prev_bac = model_bac_ts.at[i-1, 'bac']
-        current_aer = calc_aer(person.sex, prev_bac)
-        # For a 1-minute interval, elimination is current_aer divided by 60
-        elimination_interval = current_aer / 60
-        model_bac_ts.at[i, 'eliminated'] = model_bac_ts.at[i-1, 'eliminated'] + min(current_bac, elimination_interval)
+    Each path carries its own baseline AER ``a0`` (e.g. a per-draw body
+    factor or sex); paths are independent, so the path axis runs across
+    threads while each thread walks its own sequential time loop.
+    """
+    eliminated = np.zeros_like(be)
+    bac = np.zeros_like(be)
+    _bac_batch(be, a0, dt_min, eliminated, bac)
 
-    model_bac_ts['bac'] = model_bac_ts['bac_excluding_elimination'] - model_bac_ts['eliminated']
-    model_bac_ts['bac_perc'] = model_bac_ts['bac'] * 100
+    return eliminated, bac
 
-    bac_zero_idx = model_bac_ts.loc[absorption_end_idx:].loc[model_bac_ts['bac'] == 0.0].index.min()
 
-    if pd.isna(bac_zero_idx):
-        bac_zero_idx = len(model_bac_ts)
+def calculate_bac_for_model(
+    person: Person,
+    kg_absorbed: np.ndarray,
+    model: Model,
+    absorption_end_idx: int
+) -> tuple[np.ndarray, int]:
+    r = calculate_body_factor(person, model)
+    be = kg_absorbed / (r * person.weight)
+
+    a0 = 0.16 if person.sex == Sex.F else 0.14
+    n = len(be)
+    stop = min(absorption_end_idx + 1, n)
+
+    if a0 >= 0.035:
+        # the AER sits at its 0.035 cap for any non-negative BAC (a0 alone
+        # already exceeds it), so the absorbing head collapses to the
+        # constant-AER closed form and the tail is plain linear decay
+        step = 0.035 / 60
+        bac = np.empty_like(be)
+        bac[:stop] = be[:stop] - _eliminate_const_aer(be[:stop], step)
+        if stop < n:
+            tail = bac[stop - 1] - step * np.arange(1.0, n - stop + 1)
+            bac[stop:] = np.maximum(tail, 0.0, out=tail)
+    else:
+        _, bac = _bac_recurrence(be, a0, 1 / 60)
+
+    tail = bac[absorption_end_idx:] == 0.0
+    bac_zero_idx = absorption_end_idx + int(tail.argmax()) if tail.any() else len(bac)
+
+    return bac, bac_zero_idx
+
+
+def calculate_bac_for_models(
+    person: Person,
+    kg_absorbed: np.ndarray,
+    models: list[Model],
+    absorption_end_idx: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """BAC paths of several models over one shared absorption curve
 
-    return model_bac_ts, bac_zero_idx
+    Stacks the models along the path axis of the batched recurrence, so a
+    whole sweep costs one kernel call instead of a task per model.
+    """
+    r = np.array([calculate_body_factor(person, model) for model in models])
+    be = kg_absorbed[None, :] / (r[:, None] * person.weight)
+
+    a0 = 0.16 if person.sex == Sex.F else 0.14
+    n = be.shape[1]
+    stop = min(absorption_end_idx + 1, n)
+
+    if a0 >= 0.035:
+        # same constant-AER closed form as the single-model path, row-wise
+        step = 0.035 / 60
+        bac = np.empty_like(be)
+        bac[:, :stop] = be[:, :stop] - _eliminate_const_aer(be[:, :stop], step)
+        if stop < n:
+            tail = bac[:, stop - 1][:, None] - step * np.arange(1.0, n - stop + 1)[None, :]
+            bac[:, stop:] = np.maximum(tail, 0.0, out=tail)
+    else:
+        _, bac = batch_bac(be, np.full(len(models), a0), 1 / 60)
+
+    tail_zero = bac[:, absorption_end_idx:] == 0.0
+    bac_zero_idx = np.where(tail_zero.any(axis=1), absorption_end_idx + tail_zero.argmax(axis=1), n)
+
+    return bac, bac_zero_idx
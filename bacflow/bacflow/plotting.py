@@ -1,25 +1,24 @@
-import pandas as pd
 import plotly.graph_objects as go
 
-from bacflow.schemas import Model
+from bacflow.schemas import SimulationResult
 
 
-def plot_simulation(results: dict[Model, pd.DataFrame], threshold: float | None = None) -> go.Figure:
-    fig = go.Figure()
-    for model, bac_ts in results.items():
-        fig.add_trace(go.Scatter(
-            x=bac_ts['time'],
-            y=bac_ts['bac_perc'],
+_BASE_LAYOUT = dict(xaxis_title='Time', yaxis_title='BAC (%)')
+
+
+def plot_simulation(results: SimulationResult, threshold: float | None = None) -> go.Figure:
+    traces = [
+        go.Scatter(
+            x=results.time,
+            y=results.bac[i] * 100,
             mode='lines',
             name=str(model)
-        ))
+        )
+        for i, model in enumerate(results.models)
+    ]
+    fig = go.Figure(data=traces, layout=_BASE_LAYOUT)
 
     if threshold:
         fig.add_hline(y=threshold, line_dash="dash", line_color="red")
-    
-    fig.update_layout(
-        xaxis_title='Time',
-        yaxis_title='BAC (%)'
-    )
 
     return fig
@@ -3,6 +3,9 @@ from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from enum import Enum
 
+import numpy as np
+import pandas as pd
+
 
 class DriverProfile(str, Enum):
     regular = "regular"
@@ -33,7 +36,7 @@ class Sex(str, Enum):
         return self.value
 
 
-@dataclass
+@dataclass(frozen=True)
 class Person:
     DoB: date
     height: float 
@@ -46,7 +49,7 @@ class Person:
         return today.year - self.DoB.year - ((today.month, today.day) < (self.DoB.month, self.DoB.day))
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Drink:
     name: str
     vol: float
@@ -54,10 +57,16 @@ class Drink:
     time: datetime
     sip_interval: int
     alc_kg: float = field(init=False)
+    ts_epoch: float = field(init=False)
+    time_str: str = field(init=False)
 
     def __post_init__(self):
+        # frozen: derived fields go through object.__setattr__
         alc_vol = self.vol * self.alc_prop
-        self.alc_kg = alc_vol * 0.789
+        object.__setattr__(self, "alc_kg", alc_vol * 0.789)
+        object.__setattr__(self, "ts_epoch", self.time.timestamp())
+        # canonical short label, formatted once instead of per render
+        object.__setattr__(self, "time_str", self.time.strftime("%Y-%m-%d %H:%M"))
 
     def split_into_sips(self) -> list[typing.Self]:
         if self.sip_interval == 1:
@@ -76,3 +85,31 @@ class Drink:
             ))
 
         return sips
+
+    def split_into_sips_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """per-sip (alc_kg, epoch seconds) arrays, skipping per-sip Drink instances"""
+        if self.sip_interval == 1:
+            return np.array([self.alc_kg]), np.array([self.ts_epoch])
+
+        kg = np.full(self.sip_interval, self.alc_kg / self.sip_interval)
+        ts = self.ts_epoch + 60.0 * np.arange(self.sip_interval)
+
+        return kg, ts
+
+
+@dataclass
+class SimulationResult:
+    """BAC paths of a model sweep, kept as one (models x minutes) matrix"""
+    time: pd.DatetimeIndex
+    bac: np.ndarray
+    models: list[Model]
+
+    def __bool__(self) -> bool:
+        return bool(self.models)
+
+    def to_frames(self) -> dict[Model, pd.DataFrame]:
+        """per-model DataFrames, for export boundaries that want them"""
+        return {
+            model: pd.DataFrame({'time': self.time, 'bac': self.bac[i]})
+            for i, model in enumerate(self.models)
+        }
@@ -1,17 +1,23 @@
-from bisect import insort
-from datetime import datetime
+import re
+from datetime import date, datetime
+from functools import lru_cache
 
 import pandas as pd
 import streamlit as st
+from sortedcontainers import SortedKeyList
 from streamlit_js_eval import get_geolocation
 
 from bacflow.geolocation import get_threshold_by_driver_profile, decode_coordinates
 from bacflow.modeling import simulation_F, simulation_M
-from bacflow.plotting import plot_simulation
-from bacflow.schemas import Drink, DriverProfile, Model, Person, Sex
+from bacflow.schemas import Drink, DriverProfile, Model, Person, Sex, SimulationResult
 from bacflow.simulation import simulate
 
 
+# expected drink-time shape; checked up front so malformed input never
+# reaches the parser
+_TIME_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}")
+
+
 def _get_coordinates() -> tuple[float| None, float | None]:
     location = get_geolocation()
 
@@ -22,10 +28,10 @@ def _get_coordinates() -> tuple[float| None, float | None]:
     return latitude, longitude
 
 
-def _get_min_age_threshold(age: int) -> datetime:
-    today = datetime.now()
-    day = today.day
-
+@lru_cache(maxsize=8)
+def _get_min_age_threshold(age: int, today: date) -> date:
+    # memoized on the calendar day, so the replace() runs once a day
+    # instead of on every widget interaction
     try:
         threshold = today.replace(year=today.year - age)
     except ValueError:
@@ -36,17 +42,45 @@ def _get_min_age_threshold(age: int) -> datetime:
 
 @st.cache_data
 def fetch_DUI_mapping():
-    return pandas.read_csv("../../resources/DUI-driving-limits-by-alpha-2.csv")
+    return pd.read_csv("../../resources/DUI-driving-limits-by-alpha-2.csv")
 
 
 @st.cache_data
 def fetch_dataset():
-    return pandas.read_csv("../../resources/dataset.csv")
+    # explicit dtypes skip pandas' two-pass type inference on load
+    return pd.read_csv(
+        "../../resources/dataset.csv",
+        dtype={'drink': 'string', 'volume': 'int16', 'proportion': 'float32', 'color': 'string'}
+    )
+
+
+@st.cache_data
+def build_drink_defaults() -> dict[str, dict[str, float]]:
+    """drink -> default volume/proportion, an O(1) lookup per rerun"""
+    return fetch_dataset().set_index('drink')[['volume', 'proportion']].to_dict('index')
+
 
+@st.cache_data(max_entries=32)
+def run_simulation(
+    drinks: tuple[Drink, ...],
+    person: Person,
+    absorption_halflife: int,
+    simulation: tuple[Model, ...]
+) -> SimulationResult:
+    """memoized simulate: cosmetic widget interactions hit the cache"""
+    return simulate(list(drinks), person, absorption_halflife, list(simulation))
+
+
+MODEL_LABELS = {model: str(model) for model in Model}
+OPTIONS_BY_SEX = {Sex.M: tuple(simulation_M), Sex.F: tuple(simulation_F)}
 
 latitude, longitude = _get_coordinates()
 
+# one clock read per rerun, shared by the placeholder and the fallback time
+now = datetime.now().astimezone()
+
 drink_info = fetch_dataset()
+drink_defaults = build_drink_defaults()
 DUI_mapping = fetch_DUI_mapping()
 # UI Components
 st.title("BACflow: Estimate your Blood Alcohol Concentration (BAC)")
@@ -54,70 +88,78 @@ st.title("BACflow: Estimate your Blood Alcohol Concentration (BAC)")
 st.sidebar.header("Enter your information")
 profile = DriverProfile(st.sidebar.selectbox("What kind of driver are you?", [profile.value for profile in DriverProfile]))
 sex = Sex(st.sidebar.selectbox("Sex", [sex.value for sex in Sex]))
-DoB = st.sidebar.date_input("Date of Birth", max_value=_get_min_age_threshold(18))
+DoB = st.sidebar.date_input("Date of Birth", max_value=_get_min_age_threshold(18, date.today()))
 height = st.sidebar.slider("Height (cm)", 140, 210, 170)
 weight = st.sidebar.slider("Weight (kg)", 40, 150, 82)
 absorption_halflife = st.sidebar.slider("Absorption halflife (min)", 6, 18, 12) * 60
 simulation = st.sidebar.multiselect(
     "Select simulation models",
-    simulation_M if sex == Sex.M else simulation_F,
+    OPTIONS_BY_SEX[sex],
     default=[Model.Seidl],
-    format_func=lambda model: str(model)
+    format_func=MODEL_LABELS.__getitem__
 )
 
 st.sidebar.header("Add a drink")
 drink_type = st.sidebar.selectbox("Drink type", drink_info['drink'])
 volume = st.sidebar.slider(
     "Volume (cl)", 1, 120,
-    int(drink_info[drink_info['drink'] == drink_type]['volume'].iloc[0])
+    int(drink_defaults[drink_type]['volume'])
 )
 alc_perc = st.sidebar.slider(
     "Percent alcohol", 0, 100,
-    int(drink_info[drink_info['drink'] == drink_type]['proportion'].iloc[0] * 100)
+    int(drink_defaults[drink_type]['proportion'] * 100)
 )
 drink_time_str = st.sidebar.text_input(
     "Time of consumption (YYYY-MM-DD HH:MM)",
-    placeholder=datetime.now().astimezone().strftime("%Y-%m-%d %H:%M")
+    placeholder=now.strftime("%Y-%m-%d %H:%M")
 )
 interval_duration = st.sidebar.slider("Interval duration (minutes)", 1, 60, 1)
 add_drink = st.sidebar.button("Add drink")
 
 # Initialize session state for drinks
 if 'drinks' not in st.session_state:
-    st.session_state.drinks = []
+    st.session_state.drinks = SortedKeyList(key=lambda drink: drink.ts_epoch)
 
 # Add drink to session state
 if add_drink:
     try:
         if drink_time_str:
-            drink_time = datetime.strptime(drink_time_str, "%Y-%m-%d %H:%M").astimezone()
+            if not _TIME_RE.fullmatch(drink_time_str):
+                raise ValueError(drink_time_str)
+            # fromisoformat is a C-level parser, unlike strptime which
+            # re-interprets its format string on every submit
+            drink_time = datetime.fromisoformat(drink_time_str).astimezone()
         else:
-            drink_time = datetime.now().astimezone()
-
-        insort(
-            st.session_state.drinks,
-            Drink(
-                name=drink_type,
-                vol=volume / 100,
-                alc_prop=alc_perc / 100,
-                time=drink_time,
-                sip_interval=interval_duration
-            ),
-            key=lambda x: x.time
-        )
+            drink_time = now
+
+        st.session_state.drinks.add(Drink(
+            name=drink_type,
+            vol=volume / 100,
+            alc_prop=alc_perc / 100,
+            time=drink_time,
+            sip_interval=interval_duration
+        ))
     except ValueError:
         st.sidebar.error("Incorrect time format. Please use YYYY-MM-DD HH:MM.")
 
-# Display added drinks with delete option
+# Display added drinks; deletions are collected in one form so a whole
+# batch costs a single rerun instead of one per row
 st.header("Drunken drinks")
-for i, drink in enumerate(st.session_state.drinks):
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        st.write(f"{drink.name} - {drink.vol*100} cl, {drink.alc_prop*100}% at {drink.time.strftime('%Y-%m-%d %H:%M')} in {drink.sip_interval} minutes")
-    with col2:
-        if st.button("🗑️", key=f"delete_drink_{i}"):
-            st.session_state.drinks.pop(i)
-            st.experimental_rerun()
+if st.session_state.drinks:
+    with st.form("manage_drinks"):
+        selected = [
+            st.checkbox(
+                f"{drink.name} - {drink.vol*100} cl, {drink.alc_prop*100}% at {drink.time_str} in {drink.sip_interval} minutes",
+                key=f"delete_drink_{i}"
+            )
+            for i, drink in enumerate(st.session_state.drinks)
+        ]
+        if st.form_submit_button("🗑️ Delete selected"):
+            for i in reversed([i for i, delete in enumerate(selected) if delete]):
+                st.session_state.drinks.pop(i)
+            for key in [key for key in st.session_state if key.startswith("delete_drink_")]:
+                del st.session_state[key]
+            st.rerun()
 
 person = Person(DoB=DoB, height=height / 100, weight=weight, sex=sex)
 threshold = get_threshold_by_driver_profile(latitude, longitude, profile, DUI_mapping)
@@ -132,8 +174,12 @@ if st.session_state.drinks:
     if not simulation:
         st.error("Please select one or more simulation models.")
     else:
-        results = simulate(
-            st.session_state.drinks, person, absorption_halflife, simulation
+        # deferred so plotly is only imported once a figure is actually
+        # rendered; it dominates the app's cold-start time otherwise
+        from bacflow.plotting import plot_simulation
+
+        results = run_simulation(
+            tuple(st.session_state.drinks), person, absorption_halflife, tuple(simulation)
         )
 
         st.header("BAC over time")
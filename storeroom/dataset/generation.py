@@ -1,10 +1,18 @@
 import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 
 import numpy as np
 import pandas as pd
 
 
+_device_setups = [
+    ('Samsung Galaxy S21', 'Samsung Galaxy Watch 3'),
+    ('iPhone 12', 'Apple Watch Series 6'),
+    ('Google Pixel 5', 'Fitbit Versa 2')
+]
+
 # g / ml
 _labelspace = {
     "[0.00]",  # sobriety
@@ -22,21 +30,21 @@ def generate_coherent_demographic_features(num_entries):
     with gender-specific variations for heights, based on paper statistics.
     """
     genders = np.random.choice(['male', 'female'], num_entries)
-    heights = np.zeros(num_entries).astype(int)
-    
-    for i in range(num_entries):
-        if genders[i] == 'male':
-            heights[i] = int(np.random.normal(175, 7))
-        elif genders[i] == 'female':
-            heights[i] = int(np.random.normal(163, 7))
-    
-    weights = []
-    for i in range(num_entries):
-        base_weight = 50 + (heights[i] - 150) * 0.5  # Basic weight increases linearly with height.
-        if genders[i] == 'male':
-            weights.append(int(np.random.normal(base_weight + 10, 10)))
-        elif genders[i] == 'female':
-            weights.append(int(np.random.normal(base_weight, 10)))
+    male = genders == 'male'
+
+    # one batched draw per sex per field instead of a scalar RNG call per entry
+    heights = np.where(
+        male,
+        np.random.normal(175, 7, num_entries),
+        np.random.normal(163, 7, num_entries)
+    ).astype(int)
+
+    base_weight = 50 + (heights - 150) * 0.5  # Basic weight increases linearly with height.
+    weights = np.where(
+        male,
+        np.random.normal(base_weight + 10, 10),
+        np.random.normal(base_weight, 10)
+    ).astype(int)
 
     return heights, weights, genders
 
@@ -61,7 +69,9 @@ def generate_synthetic_trajectory_with_devices(participant_key: str, trajectory_
         label: Label corresponding to BAC level or impairment category.
         frequency: Sampling frequency in Hz.
     Returns:
-        Two DataFrames: metadata and time series data.
+        A metadata DataFrame and the time series as a dict of column arrays
+        (float32 sensors, datetime64 timestamps); wrap with timeseries_frame
+        where pandas is actually needed.
     """
     assert label in _labelspace, f"unknown label; should be one of {_labelspace}"
 
@@ -77,25 +87,30 @@ def generate_synthetic_trajectory_with_devices(participant_key: str, trajectory_
     # Compute sensor variance
     sensor_variance = compute_sensor_variance(height, weight)
     
-    # Simulate smartphone and smartwatch data
-    np.random.seed(participant_key)  # Reproducibility based on participant
-    acc_data_smartphone = np.random.normal(loc=0, scale=sensor_variance, size=(num_samples, 3))
-    gyro_data_smartphone = np.random.normal(loc=0, scale=sensor_variance / 2, size=(num_samples, 3))
-    acc_data_smartwatch = np.random.normal(loc=0, scale=sensor_variance * 1.5, size=(num_samples, 3))
-    gyro_data_smartwatch = np.random.normal(loc=0, scale=sensor_variance, size=(num_samples, 3))
+    # Simulate smartphone and smartwatch data; float32 is ample for synthetic
+    # sensor noise and halves the memory of every downstream stage. A
+    # per-participant PCG64 generator replaces the legacy global seed, so
+    # trajectories stay reproducible without process-global RNG state and
+    # participants can be generated concurrently.
+    rng = np.random.default_rng(participant_key)
+    sensors = rng.standard_normal((num_samples, 12), dtype=np.float32)
+    sensors[:, 0:3] *= sensor_variance
+    sensors[:, 3:6] *= sensor_variance / 2
+    sensors[:, 6:9] *= sensor_variance * 1.5
+    sensors[:, 9:12] *= sensor_variance
+    acc_data_smartphone = sensors[:, 0:3]
+    gyro_data_smartphone = sensors[:, 3:6]
+    acc_data_smartwatch = sensors[:, 6:9]
+    gyro_data_smartwatch = sensors[:, 9:12]
     
-    # Generate timestamps
+    # Generate timestamps as one datetime64[ns] column; no per-sample
+    # datetime/timedelta objects
     start_time = datetime.now()
-    timestamps = [start_time + timedelta(seconds=i/frequency) for i in range(num_samples)]
+    timestamps = pd.date_range(start=start_time, periods=num_samples, freq=pd.Timedelta(seconds=1 / frequency))
     
-    # Choosing two random smartphone and smartwatch models
-    device_setup_types = np.random.choice([
-        ('Samsung Galaxy S21', 'Samsung Galaxy Watch 3'),
-        ('iPhone 12', 'Apple Watch Series 6'),
-        ('Google Pixel 5', 'Fitbit Versa 2')
-    ])
-    smartphone_type = device_setup_types[0]
-    smartwatch_type = device_setup_types[1]
+    # Choosing a random smartphone and smartwatch setup by index
+    # (np.random.choice cannot sample a list of tuples)
+    smartphone_type, smartwatch_type = _device_setups[rng.integers(len(_device_setups))]
     
     # Creating the metadata DataFrame
     metadata_df = pd.DataFrame({
@@ -111,9 +126,10 @@ def generate_synthetic_trajectory_with_devices(participant_key: str, trajectory_
         'gender': [gender]
     })
     
-    # Creating the time series DataFrame
-    timeseries_df = pd.DataFrame({
-        'timestamp': timestamps,
+    # Time series stays SoA: a dict of column arrays (sensor columns are
+    # zero-copy views into the generated blocks), no DataFrame indirection
+    timeseries = {
+        'timestamp': timestamps.to_numpy(),
         'acc_x_smartphone': acc_data_smartphone[:, 0],
         'acc_y_smartphone': acc_data_smartphone[:, 1],
         'acc_z_smartphone': acc_data_smartphone[:, 2],
@@ -126,12 +142,38 @@ def generate_synthetic_trajectory_with_devices(participant_key: str, trajectory_
         'gyro_x_smartwatch': gyro_data_smartwatch[:, 0],
         'gyro_y_smartwatch': gyro_data_smartwatch[:, 1],
         'gyro_z_smartwatch': gyro_data_smartwatch[:, 2]
-    })
-    
-    return metadata_df, timeseries_df
+    }
+
+    return metadata_df, timeseries
+
+
+def generate_dataset(participant_keys, trajectory_key, duration_seconds, label, frequency=50, max_workers=None):
+    """
+    Generate one trajectory per participant, fanned out over worker processes.
+
+    Participants share no state — each worker seeds its own per-participant
+    generator — so generation scales with core count. Returns the
+    (metadata_df, timeseries) pairs in participant order.
+    """
+    generate = partial(
+        generate_synthetic_trajectory_with_devices,
+        trajectory_key=trajectory_key,
+        duration_seconds=duration_seconds,
+        label=label,
+        frequency=frequency
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(generate, participant_keys))
+
+
+def timeseries_frame(timeseries):
+    """
+    Wrap the SoA time-series arrays in a DataFrame at the pandas boundary.
+    """
+    return pd.DataFrame(timeseries)
 
 
 if __name__ == "__main__":
-    metadata_df, timeseries_df = generate_synthetic_trajectory_with_devices(participant_key=1, trajectory_key=1, duration_seconds=60, label="[0.00]", frequency=50)
+    metadata_df, timeseries = generate_synthetic_trajectory_with_devices(participant_key=1, trajectory_key=1, duration_seconds=60, label="[0.00]", frequency=50)
     print(metadata_df)
-    print(timeseries_df)
+    print(timeseries_frame(timeseries))
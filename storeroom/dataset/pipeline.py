@@ -1,15 +1,58 @@
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
+from numba import njit, prange
 from scipy import signal
-from scipy.signal import find_peaks, periodogram, welch
+from scipy.fft import rfft
+from scipy.signal import welch
 from scipy.stats import kurtosis, skew, chi2
 
-
-def load_and_preprocess_data(dataframe, fill_method='ffill'):
+try:
+    # route scipy's FFTs through FFTW when pyfftw is around: cached, SIMD
+    # plans get reused across the batched PSD calls; pocketfft otherwise
+    import pyfftw
+    import scipy.fft
+    pyfftw.interfaces.cache.enable()
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+except ImportError:
+    pass
+
+__all__ = [
+    'FEATURE_NAMES',
+    'load_and_preprocess_data',
+    'normalize_and_remove_outliers',
+    'segment_data',
+    'calculate_combined_features',
+    'calculate_features',
+    'sensor_data_pipeline',
+]
+
+
+@njit(cache=True)
+def _forward_fill(arr):
+    n, k = arr.shape
+    last = arr[0].copy()
+    for i in range(n):
+        for j in range(k):
+            v = arr[i, j]
+            if np.isnan(v):
+                arr[i, j] = last[j]
+            else:
+                last[j] = v
+
+
+def load_and_preprocess_data(dataframe):
     """
     Load and preprocess the raw sensor data.
     """
-    dataframe.fillna(method=fill_method, inplace=True)
+    # forward-fill the sensor columns through one typed float32 block; pandas'
+    # fillna(method=...) is gone in pandas 3 and its replacement still walks
+    # object-aware block code, while float32 also halves the bandwidth
+    numeric_cols = dataframe.select_dtypes(include=np.number).columns
+    arr = dataframe[numeric_cols].to_numpy(dtype=np.float32, copy=True)
+    _forward_fill(arr)
+    dataframe[numeric_cols] = arr
     return dataframe
 
 
@@ -17,11 +60,22 @@ def normalize_and_remove_outliers(data):
     """
     Normalize sensor data using Z-score and remove the top and bottom 1% of values.
     """
-    normalized_data = (data - data.mean()) / data.std()
-    lower_bound = normalized_data.quantile(0.01)
-    upper_bound = normalized_data.quantile(0.99)
-    filtered = normalized_data.where((normalized_data > lower_bound) & (normalized_data < upper_bound))
-    return filtered.dropna()
+    numeric_cols = data.select_dtypes(include=np.number).columns
+    arr = data[numeric_cols].to_numpy(dtype=np.float32, copy=True)
+    n = len(arr)
+
+    # normalize in place, then take the 1%/99% bounds as order statistics via
+    # np.partition — O(N) instead of a full per-column sort — and apply one
+    # fused row mask rather than where + dropna
+    arr -= arr.mean(axis=0)
+    arr /= arr.std(axis=0, ddof=1)
+    k_lo, k_hi = int(0.01 * (n - 1)), int(0.99 * (n - 1))
+    bounds = np.partition(arr, (k_lo, k_hi), axis=0)
+    keep = ((arr > bounds[k_lo]) & (arr < bounds[k_hi])).all(axis=1)
+
+    filtered = data.loc[keep].copy()
+    filtered[numeric_cols] = arr[keep]
+    return filtered
 
 
 def segment_data(data, window_size_seconds=5):
@@ -29,23 +83,35 @@ def segment_data(data, window_size_seconds=5):
     Segment data into fixed-size windows based on the timestamp.
     """
     data['timestamp'] = pd.to_datetime(data['timestamp'], errors='coerce')
-    start_time = data['timestamp'].min()
-    data['seconds_since_start'] = (data['timestamp'] - start_time).dt.total_seconds()
-    data['window_id'] = (data['seconds_since_start'] // window_size_seconds).astype(int)
+    # integer division on int64 nanoseconds; no float64 seconds Series and
+    # no intermediate seconds_since_start column (the explicit ns unit also
+    # covers pandas 3, whose default timestamp resolution is microseconds)
+    ts_ns = data['timestamp'].to_numpy(dtype='datetime64[ns]').view('int64')
+    start_ns = ts_ns.min()
+    data['window_id'] = ((ts_ns - start_ns) // (window_size_seconds * 1_000_000_000)).astype(np.int32)
     return data
 
 
+@lru_cache(maxsize=8)
+def _chi2_quantile(confidence):
+    # constant per confidence level; the ppf call is by far the most
+    # expensive part of the ellipse area, so pay it once
+    return chi2.ppf(confidence, df=2)
+
+
 def calculate_confidence_ellipse_area(x, y, confidence=0.95):
     """
     Calculate the area of the ellipse that encloses the 95% confidence interval
     of the 2D points (x, y). For a bivariate normal distribution, the area is:
       A = π * (chi2.ppf(confidence, 2)) * sqrt(det(Cov))
     """
-    data = np.vstack([x, y])
-    cov = np.cov(data)
-    det_cov = np.linalg.det(cov)
-    chi2_val = chi2.ppf(confidence, df=2)
-    area = np.pi * chi2_val * np.sqrt(det_cov)
+    # 2x2 covariance determinant in closed form from dot products; no
+    # stacked copy, no np.cov, no LAPACK determinant
+    xm = x - np.mean(x)
+    ym = y - np.mean(y)
+    n1 = len(x) - 1
+    det_cov = ((xm @ xm) * (ym @ ym) - (xm @ ym) ** 2) / (n1 * n1)
+    area = np.pi * _chi2_quantile(confidence) * np.sqrt(det_cov)
     return area
 
 
@@ -53,23 +119,46 @@ def calculate_sway_volume(data_x, data_y, data_z, confidence=0.95):
     """
     Calculate the volume of the sphere that encloses 95% of the 3D points.
     """
-    points = np.vstack([data_x, data_y, data_z]).T
-    center = np.mean(points, axis=0)
-    distances = np.linalg.norm(points - center, axis=1)
+    # distances straight from the centred columns; no (N, 3) stack-transpose
+    dx = data_x - np.mean(data_x)
+    dy = data_y - np.mean(data_y)
+    dz = data_z - np.mean(data_z)
+    distances = np.sqrt(dx * dx + dy * dy + dz * dz)
     r = np.percentile(distances, 95)
     volume = (4/3) * np.pi * (r ** 3)
     return volume
 
 
+@njit(fastmath=True, cache=True)
+def _acc_magnitude(acc_data):
+    # fused row-wise magnitude; no (N, 3) squared temporary
+    n = acc_data.shape[0]
+    out = np.empty(n)
+    for i in range(n):
+        out[i] = np.sqrt(acc_data[i, 0]**2 + acc_data[i, 1]**2 + acc_data[i, 2]**2)
+    return out
+
+
+def fast_peaks(x, threshold):
+    """
+    Indices of strict local maxima above threshold — the rule find_peaks
+    applied to these signals, as three fused comparisons instead of a
+    scipy call whose Python-level plateau/prominence handling dominates
+    on short windows.
+    """
+    interior = x[1:-1]
+    is_peak = (interior > x[:-2]) & (interior > x[2:]) & (interior > threshold)
+    return np.nonzero(is_peak)[0] + 1
+
+
 def calculate_gait_features(acc_data, frequency=50):
     """
     Calculate gait features: number of steps and cadence.
     Returns (steps, cadence, peaks).
     """
     # Compute magnitude of accelerometer data (assumed gravity-corrected)
-    g_mag = np.sqrt(np.sum(np.square(acc_data), axis=1))
-    threshold = np.mean(g_mag) + np.std(g_mag)
-    peaks, _ = find_peaks(g_mag, height=threshold)
+    g_mag = _acc_magnitude(np.ascontiguousarray(acc_data, dtype=np.float64))
+    peaks = fast_peaks(g_mag, np.mean(g_mag) + np.std(g_mag))
     steps = len(peaks)
     duration_minutes = (len(acc_data) / frequency) / 60
     cadence = steps / duration_minutes if duration_minutes > 0 else 0
@@ -83,51 +172,76 @@ def calculate_statistical_features(data):
     return skew(data), kurtosis(data)
 
 
-def calculate_harmonics(data):
+def calculate_frequency_ratio(freqs, pxx, split_hz=3.0):
+    """
+    Ratio of spectral power above vs below the gait band, from a precomputed spectrum.
+    """
+    low = np.sum(pxx[freqs <= split_hz])
+    high = np.sum(pxx[freqs > split_hz])
+    return high / low if low > 0 else 0
+
+
+def calculate_band_power(freqs, pxx, low_hz=0.5, high_hz=3.0):
+    """
+    Spectral power within the gait band, from a precomputed spectrum.
+    """
+    band = (freqs >= low_hz) & (freqs <= high_hz)
+    return np.trapezoid(pxx[band], freqs[band])
+
+
+def calculate_signal_noise_ratio(pxx):
     """
-    Calculate Total Harmonic Distortion (THD) using a periodogram.
+    SNR (dB) of the dominant spectral peak against the rest of a precomputed spectrum.
     """
-    freqs, pxx = periodogram(data)
-    if len(pxx) < 6 or pxx[1] == 0:
+    peak = np.max(pxx)
+    noise = np.sum(pxx) - peak
+    return 10 * np.log10(peak / noise) if noise > 0 else 0
+
+
+def calculate_harmonics(acc_signal):
+    """
+    Calculate Total Harmonic Distortion (THD) directly from the DFT.
+
+    The periodogram this used to consume is |X_k|^2 up to a constant scale
+    that cancels in the THD ratio, and its constant detrend only touches
+    bin 0 — so six rfft bins replace the whole spectrum computation.
+    """
+    power = np.abs(rfft(acc_signal)[1:6]) ** 2
+    if len(power) < 5 or power[0] == 0:
         return 0
-    fundamental = np.abs(pxx[1])
-    harmonics = np.abs(pxx[2:6])
-    thd = np.sqrt(np.sum(harmonics**2)) / fundamental
-    return thd
+    return np.sqrt(np.sum(power[1:] ** 2)) / power[0]
 
 
-def calculate_velocity_and_residual(acc_signal, frequency=50):
+def calculate_velocity_and_residual(acc_signal, peaks, frequency=50):
     """
     Detrend and integrate a gravity-corrected acceleration signal to obtain a velocity signal,
-    then compute the average gait velocity and residual step length from detected steps.
+    then compute the average gait velocity and residual step length from the given step peaks.
     """
     dt = 1 / frequency
     acc_detrended = signal.detrend(acc_signal)
     velocity = np.cumsum(acc_detrended) * dt
 
-    peaks, _ = find_peaks(acc_signal, height=np.mean(acc_signal) + np.std(acc_signal))
     if len(peaks) < 2:
         return 0, 0  # Not enough steps to compute features
 
     step_lengths = []
     for i in range(1, len(peaks)):
         start, end = peaks[i-1], peaks[i]
-        displacement = np.trapz(velocity[start:end], dx=dt)
+        displacement = np.trapezoid(velocity[start:end], dx=dt)
         step_lengths.append(displacement)
     avg_step_length = np.mean(step_lengths)
     residual_step_length = np.mean(np.abs(np.array(step_lengths) - avg_step_length))
-    total_displacement = np.trapz(velocity, dx=dt)
+    total_displacement = np.trapezoid(velocity, dx=dt)
     total_time = len(acc_signal) * dt
     avg_velocity = total_displacement / total_time if total_time > 0 else 0
     return avg_velocity, residual_step_length
 
 
-def calculate_step_time_features(acc_signal, frequency=50):
+def calculate_step_time_features(peaks, frequency=50):
     """
-    Calculate average step time and residual step time from the accelerometer signal.
+    Calculate average step time and residual step time from detected step peaks.
     """
     dt = 1 / frequency
-    peaks, _ = find_peaks(acc_signal, height=np.mean(acc_signal) + np.std(acc_signal))
     if len(peaks) < 2:
         return 0, 0
     step_intervals = np.diff(peaks) * dt
@@ -139,128 +253,406 @@ def calculate_step_time_features(acc_signal, frequency=50):
 def calculate_velocity_features(acc_data, frequency=50):
     """
     Calculate mean and variance for velocity signals obtained from accelerometer data.
-    Expects a DataFrame with columns: 'acc_x', 'acc_y', 'acc_z'.
+    Expects an (N, 3) ndarray with acc_x, acc_y, acc_z columns.
     """
     dt = 1 / frequency
-    velocity_x = np.cumsum(acc_data['acc_x'] * dt)
-    velocity_y = np.cumsum(acc_data['acc_y'] * dt)
-    velocity_z = np.cumsum(acc_data['acc_z'] * dt)
-    
-    return (np.mean(velocity_x), np.var(velocity_x),
-            np.mean(velocity_y), np.var(velocity_y),
-            np.mean(velocity_z), np.var(velocity_z))
+    # scale after the reductions (mean(c*v) = c*mean(v), var(c*v) = c^2*var(v))
+    # so the full-size dt multiply and its temporary disappear
+    velocity = np.cumsum(acc_data, axis=0)
+
+    return (dt * np.mean(velocity[:, 0]), dt * dt * np.var(velocity[:, 0]),
+            dt * np.mean(velocity[:, 1]), dt * dt * np.var(velocity[:, 1]),
+            dt * np.mean(velocity[:, 2]), dt * dt * np.var(velocity[:, 2]))
 
 
 def calculate_angular_velocity_features(gyro_data, frequency=50):
     """
     Calculate mean and variance for angular velocity signals.
-    Expects a DataFrame with columns: 'gyro_x', 'gyro_y', 'gyro_z'.
+    Expects an (N, 3) ndarray with gyro_x, gyro_y, gyro_z columns.
     """
     dt = 1 / frequency
-    angular_velocity_x = np.cumsum(gyro_data['gyro_x'] * dt)
-    angular_velocity_y = np.cumsum(gyro_data['gyro_y'] * dt)
-    angular_velocity_z = np.cumsum(gyro_data['gyro_z'] * dt)
-    
-    return (np.mean(angular_velocity_x), np.var(angular_velocity_x),
-            np.mean(angular_velocity_y), np.var(angular_velocity_y),
-            np.mean(angular_velocity_z), np.var(angular_velocity_z))
+    angular_velocity = np.cumsum(gyro_data, axis=0)
 
+    return (dt * np.mean(angular_velocity[:, 0]), dt * dt * np.var(angular_velocity[:, 0]),
+            dt * np.mean(angular_velocity[:, 1]), dt * dt * np.var(angular_velocity[:, 1]),
+            dt * np.mean(angular_velocity[:, 2]), dt * dt * np.var(angular_velocity[:, 2]))
 
-def calculate_combined_features(df):
+
+_SENSOR_COLUMNS = [
+    'acc_x_smartphone', 'acc_y_smartphone', 'acc_z_smartphone',
+    'gyro_x_smartphone', 'gyro_y_smartphone', 'gyro_z_smartphone',
+    'acc_x_smartwatch', 'acc_y_smartwatch', 'acc_z_smartwatch',
+    'gyro_x_smartwatch', 'gyro_y_smartwatch', 'gyro_z_smartwatch',
+]
+
+FEATURE_NAMES = [
+    # Smartphone features
+    'steps_smartphone',
+    'cadence_smartphone',
+    'avg_velocity_smartphone',
+    'residual_step_length_smartphone',
+    'avg_step_time_smartphone',
+    'residual_step_time_smartphone',
+    'XY_sway_area_smartphone',
+    'YZ_sway_area_smartphone',
+    'XZ_sway_area_smartphone',
+    'sway_volume_smartphone',
+    'frequency_ratio_smartphone',
+    'band_power_smartphone',
+    'signal_noise_ratio_smartphone',
+    'skewness_smartphone',
+    'kurtosis_smartphone',
+    'total_harmonic_distortion_smartphone',
+    'velocity_mean_X_smartphone',
+    'velocity_variance_X_smartphone',
+    'velocity_mean_Y_smartphone',
+    'velocity_variance_Y_smartphone',
+    'velocity_mean_Z_smartphone',
+    'velocity_variance_Z_smartphone',
+    # Smartwatch features
+    'XY_sway_area_smartwatch',
+    'YZ_sway_area_smartwatch',
+    'XZ_sway_area_smartwatch',
+    'sway_volume_smartwatch',
+    'velocity_mean_X_smartwatch',
+    'velocity_variance_X_smartwatch',
+    'velocity_mean_Y_smartwatch',
+    'velocity_variance_Y_smartwatch',
+    'velocity_mean_Z_smartwatch',
+    'velocity_variance_Z_smartwatch',
+    'angular_velocity_mean_X_smartwatch',
+    'angular_velocity_variance_X_smartwatch',
+    'angular_velocity_mean_Y_smartwatch',
+    'angular_velocity_variance_Y_smartwatch',
+    'angular_velocity_mean_Z_smartwatch',
+    'angular_velocity_variance_Z_smartwatch',
+]
+
+
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+
+def _combined_feature_values(cols):
     """
-    Calculate all high-level features for both smartphone and smartwatch data.
+    One window's feature row (FEATURE_NAMES order) from a dict of column ndarrays.
     """
+    acc_z = cols['acc_z_smartphone']
+    smartphone_acc = np.column_stack((
+        cols['acc_x_smartphone'], cols['acc_y_smartphone'], acc_z
+    ))
+    gyro_x = cols['gyro_x_smartphone']
+    gyro_y = cols['gyro_y_smartphone']
+    gyro_z = cols['gyro_z_smartphone']
+    smartwatch_acc = np.column_stack((
+        cols['acc_x_smartwatch'], cols['acc_y_smartwatch'], cols['acc_z_smartwatch']
+    ))
+    smartwatch_gyro = np.column_stack((
+        cols['gyro_x_smartwatch'], cols['gyro_y_smartwatch'], cols['gyro_z_smartwatch']
+    ))
+
     # Smartphone features
-    smartphone_acc = df[['acc_x_smartphone', 'acc_y_smartphone', 'acc_z_smartphone']].values
     steps, cadence, _ = calculate_gait_features(smartphone_acc, frequency=50)
-    avg_velocity, residual_step_length = calculate_velocity_and_residual(df['acc_z_smartphone'].values, frequency=50)
-    avg_step_time, residual_step_time = calculate_step_time_features(df['acc_z_smartphone'].values, frequency=50)
-    
-    smartphone_acc_df = df[['acc_x_smartphone', 'acc_y_smartphone', 'acc_z_smartphone']].copy()
-    smartphone_acc_df.columns = ['acc_x', 'acc_y', 'acc_z']
-    velocity_feats = calculate_velocity_features(smartphone_acc_df, frequency=50)
-    
-    XY_sway_area = calculate_confidence_ellipse_area(df['gyro_x_smartphone'], df['gyro_y_smartphone'])
-    YZ_sway_area = calculate_confidence_ellipse_area(df['gyro_y_smartphone'], df['gyro_z_smartphone'])
-    XZ_sway_area = calculate_confidence_ellipse_area(df['gyro_x_smartphone'], df['gyro_z_smartphone'])
-    sway_volume = calculate_sway_volume(df['gyro_x_smartphone'], df['gyro_y_smartphone'], df['gyro_z_smartphone'])
-    
-    freq_ratio = calculate_frequency_ratio(df['acc_z_smartphone'])
-    band_power = calculate_band_power(df['acc_z_smartphone'])
-    snr = calculate_signal_noise_ratio(df['acc_z_smartphone'])
-    skewness, kurt = calculate_statistical_features(df['acc_z_smartphone'])
-    thd = calculate_harmonics(df['acc_z_smartphone'])
-    
+    # the z-axis step peaks are shared by the velocity and step-time features
+    z_peaks = fast_peaks(acc_z, np.mean(acc_z) + np.std(acc_z))
+    avg_velocity, residual_step_length = calculate_velocity_and_residual(acc_z, z_peaks, frequency=50)
+    avg_step_time, residual_step_time = calculate_step_time_features(z_peaks, frequency=50)
+    velocity_feats = calculate_velocity_features(smartphone_acc, frequency=50)
+
+    XY_sway_area = calculate_confidence_ellipse_area(gyro_x, gyro_y)
+    YZ_sway_area = calculate_confidence_ellipse_area(gyro_y, gyro_z)
+    XZ_sway_area = calculate_confidence_ellipse_area(gyro_x, gyro_z)
+    sway_volume = calculate_sway_volume(gyro_x, gyro_y, gyro_z)
+
+    # one Welch spectrum per window, shared by every spectral feature
+    # instead of an FFT per helper; THD takes its own six rfft bins
+    welch_freqs, welch_pxx = welch(acc_z, fs=50)
+    freq_ratio = calculate_frequency_ratio(welch_freqs, welch_pxx)
+    band_power = calculate_band_power(welch_freqs, welch_pxx)
+    snr = calculate_signal_noise_ratio(welch_pxx)
+    skewness, kurt = calculate_statistical_features(acc_z)
+    thd = calculate_harmonics(acc_z)
+
     # Smartwatch features (accelerometer velocity and gyroscope angular velocity)
-    smartwatch_acc = df[['acc_x_smartwatch', 'acc_y_smartwatch', 'acc_z_smartwatch']].copy()
-    smartwatch_acc.columns = ['acc_x', 'acc_y', 'acc_z']
     velocity_feats_sw = calculate_velocity_features(smartwatch_acc, frequency=50)
-    
-    smartwatch_gyro = df[['gyro_x_smartwatch', 'gyro_y_smartwatch', 'gyro_z_smartwatch']].copy()
-    smartwatch_gyro.columns = ['gyro_x', 'gyro_y', 'gyro_z']
     angular_velocity_feats = calculate_angular_velocity_features(smartwatch_gyro, frequency=50)
+
+    XY_sway_area_sw = calculate_confidence_ellipse_area(smartwatch_gyro[:, 0], smartwatch_gyro[:, 1])
+    YZ_sway_area_sw = calculate_confidence_ellipse_area(smartwatch_gyro[:, 1], smartwatch_gyro[:, 2])
+    XZ_sway_area_sw = calculate_confidence_ellipse_area(smartwatch_gyro[:, 0], smartwatch_gyro[:, 2])
+    sway_volume_sw = calculate_sway_volume(smartwatch_gyro[:, 0], smartwatch_gyro[:, 1], smartwatch_gyro[:, 2])
     
-    XY_sway_area_sw = calculate_confidence_ellipse_area(df['gyro_x_smartwatch'], df['gyro_y_smartwatch'])
-    YZ_sway_area_sw = calculate_confidence_ellipse_area(df['gyro_y_smartwatch'], df['gyro_z_smartwatch'])
-    XZ_sway_area_sw = calculate_confidence_ellipse_area(df['gyro_x_smartwatch'], df['gyro_z_smartwatch'])
-    sway_volume_sw = calculate_sway_volume(df['gyro_x_smartwatch'], df['gyro_y_smartwatch'], df['gyro_z_smartwatch'])
-    
-    return pd.Series({
+    return [
         # Smartphone features
-        'steps_smartphone': steps,
-        'cadence_smartphone': cadence,
-        'avg_velocity_smartphone': avg_velocity,
-        'residual_step_length_smartphone': residual_step_length,
-        'avg_step_time_smartphone': avg_step_time,
-        'residual_step_time_smartphone': residual_step_time,
-        'XY_sway_area_smartphone': XY_sway_area,
-        'YZ_sway_area_smartphone': YZ_sway_area,
-        'XZ_sway_area_smartphone': XZ_sway_area,
-        'sway_volume_smartphone': sway_volume,
-        'frequency_ratio_smartphone': freq_ratio,
-        'band_power_smartphone': band_power,
-        'signal_noise_ratio_smartphone': snr,
-        'skewness_smartphone': skewness,
-        'kurtosis_smartphone': kurt,
-        'total_harmonic_distortion_smartphone': thd,
-        'velocity_mean_X_smartphone': velocity_feats[0],
-        'velocity_variance_X_smartphone': velocity_feats[1],
-        'velocity_mean_Y_smartphone': velocity_feats[2],
-        'velocity_variance_Y_smartphone': velocity_feats[3],
-        'velocity_mean_Z_smartphone': velocity_feats[4],
-        'velocity_variance_Z_smartphone': velocity_feats[5],
+        steps, cadence,
+        avg_velocity, residual_step_length,
+        avg_step_time, residual_step_time,
+        XY_sway_area, YZ_sway_area, XZ_sway_area, sway_volume,
+        freq_ratio, band_power, snr,
+        skewness, kurt, thd,
+        *velocity_feats,
         # Smartwatch features
-        'XY_sway_area_smartwatch': XY_sway_area_sw,
-        'YZ_sway_area_smartwatch': YZ_sway_area_sw,
-        'XZ_sway_area_smartwatch': XZ_sway_area_sw,
-        'sway_volume_smartwatch': sway_volume_sw,
-        'velocity_mean_X_smartwatch': velocity_feats_sw[0],
-        'velocity_variance_X_smartwatch': velocity_feats_sw[1],
-        'velocity_mean_Y_smartwatch': velocity_feats_sw[2],
-        'velocity_variance_Y_smartwatch': velocity_feats_sw[3],
-        'velocity_mean_Z_smartwatch': velocity_feats_sw[4],
-        'velocity_variance_Z_smartwatch': velocity_feats_sw[5],
-        'angular_velocity_mean_X_smartwatch': angular_velocity_feats[0],
-        'angular_velocity_variance_X_smartwatch': angular_velocity_feats[1],
-        'angular_velocity_mean_Y_smartwatch': angular_velocity_feats[2],
-        'angular_velocity_variance_Y_smartwatch': angular_velocity_feats[3],
-        'angular_velocity_mean_Z_smartwatch': angular_velocity_feats[4],
-        'angular_velocity_variance_Z_smartwatch': angular_velocity_feats[5]
-    })
+        XY_sway_area_sw, YZ_sway_area_sw, XZ_sway_area_sw, sway_volume_sw,
+        *velocity_feats_sw,
+        *angular_velocity_feats,
+    ]
+
+
+def calculate_combined_features(df):
+    """
+    Calculate all high-level features for both smartphone and smartwatch data.
+    """
+    cols = {c: df[c].to_numpy() for c in _SENSOR_COLUMNS}
+    return pd.Series(_combined_feature_values(cols), index=FEATURE_NAMES)
+
+
+def _centred(m):
+    return m - m.mean(axis=1, keepdims=True)
+
+
+def _batched_ellipse_areas(xm, ym, confidence=0.95):
+    # row-wise 2x2 covariance determinants of centred (n_windows, L) inputs
+    n1 = xm.shape[1] - 1
+    det = (np.einsum('ij,ij->i', xm, xm) * np.einsum('ij,ij->i', ym, ym)
+           - np.einsum('ij,ij->i', xm, ym) ** 2) / (n1 * n1)
+    return np.pi * _chi2_quantile(confidence) * np.sqrt(det)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _gait_kernel(ax, ay, az, fs, steps, cadence):
+    # fused magnitude, threshold and local-max scan per window; windows are
+    # independent, so the window axis runs across threads
+    n_w, L = ax.shape
+    minutes = (L / fs) / 60
+
+    for w in prange(n_w):
+        g = np.empty(L)
+        total = 0.0
+        for i in range(L):
+            m = np.sqrt(ax[w, i] ** 2 + ay[w, i] ** 2 + az[w, i] ** 2)
+            g[i] = m
+            total += m
+        mean = total / L
+        sq = 0.0
+        for i in range(L):
+            d = g[i] - mean
+            sq += d * d
+        thr = mean + np.sqrt(sq / L)
+
+        count = 0
+        for i in range(1, L - 1):
+            if g[i] > thr and g[i] > g[i - 1] and g[i] > g[i + 1]:
+                count += 1
+        steps[w] = count
+        cadence[w] = count / minutes if minutes > 0 else 0.0
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _step_kernel(az, fs, avg_vel, res_len, avg_step_t, res_step_t):
+    # the window-local step features (peak scan, linear detrend, velocity
+    # prefix sum, per-peak-pair trapezoids) fused into one pass per window;
+    # mirrors calculate_velocity_and_residual / calculate_step_time_features
+    n_w, L = az.shape
+    dt = 1.0 / fs
+
+    for w in prange(n_w):
+        z = az[w]
+        total = 0.0
+        for i in range(L):
+            total += z[i]
+        mean = total / L
+        sq = 0.0
+        for i in range(L):
+            d = z[i] - mean
+            sq += d * d
+        thr = mean + np.sqrt(sq / L)
+
+        peaks = np.empty(L, dtype=np.int64)
+        n_peaks = 0
+        for i in range(1, L - 1):
+            if z[i] > thr and z[i] > z[i - 1] and z[i] > z[i + 1]:
+                peaks[n_peaks] = i
+                n_peaks += 1
+
+        # linear detrend in closed form, then the velocity prefix sum and its
+        # own prefix sum so each trapezoid is O(1)
+        x_mean = (L - 1) / 2.0
+        num = 0.0
+        den = 0.0
+        for i in range(L):
+            dx = i - x_mean
+            num += dx * (z[i] - mean)
+            den += dx * dx
+        slope = num / den if den > 0 else 0.0
+
+        velocity = np.empty(L)
+        vel_cum = np.empty(L + 1)
+        vel_cum[0] = 0.0
+        acc = 0.0
+        for i in range(L):
+            acc += (z[i] - mean - slope * (i - x_mean)) * dt
+            velocity[i] = acc
+            vel_cum[i + 1] = vel_cum[i] + acc
+
+        if n_peaks < 2:
+            # matches calculate_velocity_and_residual, which bails out
+            # before integrating when there are not enough steps
+            avg_vel[w] = 0.0
+            res_len[w] = 0.0
+            avg_step_t[w] = 0.0
+            res_step_t[w] = 0.0
+            continue
+
+        total_displacement = (vel_cum[L] - 0.5 * (velocity[0] + velocity[L - 1])) * dt
+        avg_vel[w] = total_displacement / (L * dt)
+
+        length_sum = 0.0
+        lengths = np.empty(n_peaks - 1)
+        for p in range(1, n_peaks):
+            s = peaks[p - 1]
+            e = peaks[p]
+            lengths[p - 1] = (vel_cum[e] - vel_cum[s] - 0.5 * (velocity[s] + velocity[e - 1])) * dt
+            length_sum += lengths[p - 1]
+        avg_length = length_sum / (n_peaks - 1)
+        res = 0.0
+        interval_sum = 0.0
+        for p in range(n_peaks - 1):
+            res += abs(lengths[p] - avg_length)
+            interval_sum += (peaks[p + 1] - peaks[p]) * dt
+        res_len[w] = res / (n_peaks - 1)
+
+        avg_interval = interval_sum / (n_peaks - 1)
+        res_t = 0.0
+        for p in range(n_peaks - 1):
+            res_t += abs((peaks[p + 1] - peaks[p]) * dt - avg_interval)
+        avg_step_t[w] = avg_interval
+        res_step_t[w] = res_t / (n_peaks - 1)
+
+
+def _batched_velocity_stats(m, dt):
+    v = np.cumsum(m, axis=1)
+    return dt * v.mean(axis=1), dt * dt * v.var(axis=1)
+
+
+def _batched_window_features(cols, idx_mat):
+    """
+    The (n_windows, n_features) matrix over uniform windows.
+
+    Everything expressible as a reduction along axis=1 — spectra, moments,
+    velocity integrals, sway geometry — runs once for all windows stacked
+    into (n_windows, window_len) matrices; the peak-driven step features
+    run in parallel numba kernels over the same stack.
+    """
+    n_w = idx_mat.shape[0]
+    dt = 1 / 50
+    j = _FEATURE_INDEX
+    mats = {c: cols[c][idx_mat] for c in _SENSOR_COLUMNS}
+    acc_z = mats['acc_z_smartphone']
+
+    out = np.empty((n_w, len(FEATURE_NAMES)))
+    acc_z64 = np.ascontiguousarray(acc_z, dtype=np.float64)
+
+    # steps and cadence for every window in one parallel kernel call
+    _gait_kernel(
+        np.ascontiguousarray(mats['acc_x_smartphone'], dtype=np.float64),
+        np.ascontiguousarray(mats['acc_y_smartphone'], dtype=np.float64),
+        acc_z64,
+        50.0, out[:, 0], out[:, 1]
+    )
+
+    # the peak-driven step features run in a second parallel kernel, so no
+    # per-window Python dispatch is left on this path
+    _step_kernel(acc_z64, 50.0, out[:, 2], out[:, 3], out[:, 4], out[:, 5])
+
+    # sway geometry from centred gyro columns, all windows at once
+    for dev in ('smartphone', 'smartwatch'):
+        gxm = _centred(mats[f'gyro_x_{dev}'])
+        gym = _centred(mats[f'gyro_y_{dev}'])
+        gzm = _centred(mats[f'gyro_z_{dev}'])
+        out[:, j[f'XY_sway_area_{dev}']] = _batched_ellipse_areas(gxm, gym)
+        out[:, j[f'YZ_sway_area_{dev}']] = _batched_ellipse_areas(gym, gzm)
+        out[:, j[f'XZ_sway_area_{dev}']] = _batched_ellipse_areas(gxm, gzm)
+        dist = np.sqrt(gxm * gxm + gym * gym + gzm * gzm)
+        out[:, j[f'sway_volume_{dev}']] = (4/3) * np.pi * np.percentile(dist, 95, axis=1) ** 3
+
+    # spectral and statistical features, one batched call each
+    welch_freqs, welch_pxx = welch(acc_z, fs=50, axis=1)
+    low = welch_pxx[:, welch_freqs <= 3.0].sum(axis=1)
+    high = welch_pxx[:, welch_freqs > 3.0].sum(axis=1)
+    out[:, j['frequency_ratio_smartphone']] = np.divide(high, low, out=np.zeros(n_w), where=low > 0)
+    band = (welch_freqs >= 0.5) & (welch_freqs <= 3.0)
+    out[:, j['band_power_smartphone']] = np.trapezoid(welch_pxx[:, band], welch_freqs[band], axis=1)
+    peak = welch_pxx.max(axis=1)
+    noise = welch_pxx.sum(axis=1) - peak
+    ratio = np.divide(peak, noise, out=np.ones(n_w), where=noise > 0)
+    out[:, j['signal_noise_ratio_smartphone']] = np.where(noise > 0, 10 * np.log10(ratio), 0.0)
+    out[:, j['skewness_smartphone']] = skew(acc_z, axis=1)
+    out[:, j['kurtosis_smartphone']] = kurtosis(acc_z, axis=1)
+    # THD needs only six rfft bins per window: the periodogram is |X_k|^2 up
+    # to a scale that cancels in the ratio, and its constant detrend only
+    # touches bin 0
+    power = np.abs(rfft(acc_z64, axis=1)[:, 1:6]) ** 2
+    if power.shape[1] < 5:
+        out[:, j['total_harmonic_distortion_smartphone']] = 0.0
+    else:
+        fundamental = power[:, 0]
+        harm = np.sqrt((power[:, 1:] ** 2).sum(axis=1))
+        out[:, j['total_harmonic_distortion_smartphone']] = np.divide(
+            harm, fundamental, out=np.zeros(n_w), where=fundamental != 0
+        )
+
+    # velocity integrals: one cumsum along axis=1 per channel
+    for src, dst in (
+        ('acc_x_smartphone', 'velocity_mean_X_smartphone'),
+        ('acc_y_smartphone', 'velocity_mean_Y_smartphone'),
+        ('acc_z_smartphone', 'velocity_mean_Z_smartphone'),
+        ('acc_x_smartwatch', 'velocity_mean_X_smartwatch'),
+        ('acc_y_smartwatch', 'velocity_mean_Y_smartwatch'),
+        ('acc_z_smartwatch', 'velocity_mean_Z_smartwatch'),
+        ('gyro_x_smartwatch', 'angular_velocity_mean_X_smartwatch'),
+        ('gyro_y_smartwatch', 'angular_velocity_mean_Y_smartwatch'),
+        ('gyro_z_smartwatch', 'angular_velocity_mean_Z_smartwatch'),
+    ):
+        mean_v, var_v = _batched_velocity_stats(mats[src], dt)
+        out[:, j[dst]] = mean_v
+        out[:, j[dst.replace('mean', 'variance')]] = var_v
+
+    return out
 
 
 def calculate_features(data):
     """
     Apply feature extraction on each window of segmented data.
     """
-    return data.groupby('window_id').apply(calculate_combined_features).reset_index()
+    # pull each sensor column out once, slice per window with the groupby
+    # index positions, and write feature rows into one preallocated matrix;
+    # no per-window Series construction or index alignment
+    cols = {c: data[c].to_numpy() for c in _SENSOR_COLUMNS}
+    indices = list(data.groupby('window_id').indices.items())
+    window_ids = np.array([window_id for window_id, _ in indices], dtype=np.int64)
+
+    if len({idx.size for _, idx in indices}) == 1:
+        # uniform windows — the normal case with a fixed window size — go
+        # through the batched axis=1 path
+        idx_mat = np.stack([idx for _, idx in indices])
+        out = _batched_window_features(cols, idx_mat)
+    else:
+        out = np.empty((len(indices), len(FEATURE_NAMES)))
+        for row, (_, idx) in enumerate(indices):
+            out[row] = _combined_feature_values({c: arr[idx] for c, arr in cols.items()})
+
+    features = pd.DataFrame(out, columns=FEATURE_NAMES)
+    features.insert(0, 'window_id', window_ids)
+    return features
 
 
 def sensor_data_pipeline(raw_data):
     """
     Run the complete ETL pipeline: preprocessing, outlier removal, segmentation,
-    and feature extraction.
+    and feature extraction. Accepts either a DataFrame or the generator's
+    SoA dict of column arrays.
     """
+    if not isinstance(raw_data, pd.DataFrame):
+        raw_data = pd.DataFrame(raw_data)  # wraps the column arrays zero-copy
     preprocessed = load_and_preprocess_data(raw_data)
     cleaned = normalize_and_remove_outliers(preprocessed)
     segmented = segment_data(cleaned)
@@ -1,48 +1,93 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Seidl coefficients (intercept, weight, height) and clip bounds per sex code
+_WIDMARK_COEFS = np.array([
+    [0.31223, -0.006446, 0.4466],  # 0 = female
+    [0.31608, -0.004821, 0.4632],  # 1 = male
+])
+_WIDMARK_BOUNDS = np.array([
+    [0.44, 0.80],
+    [0.60, 0.87],
+])
+_SEX_CODE = {"female": 0, "male": 1}
+
 def calc_widmark_factor(height, weight, sex):
-    r_female = 0.31223 - 0.006446 * weight + 0.4466 * height
-    r_male = 0.31608 - 0.004821 * weight + 0.4632 * height
-    r_female[r_female < 0.44] = 0.44
-    r_female[r_female > 0.8] = 0.8
-    r_male[r_male < 0.60] = 0.60
-    r_male[r_male > 0.87] = 0.87
-    
-    if sex == "female":
-        return r_female
-    elif sex == "male":
-        return r_male
-    else:  # take the mean if sex is unspecified
-        return (r_male + r_female) / 2
+    code = _SEX_CODE.get(sex)
+    if code is None:  # take the mean if sex is unspecified
+        return (calc_widmark_factor(height, weight, "female") + calc_widmark_factor(height, weight, "male")) / 2
+    a, b, c = _WIDMARK_COEFS[code]
+    lo, hi = _WIDMARK_BOUNDS[code]
+    return np.clip(a + b * np.asarray(weight, dtype=np.float64) + c * np.asarray(height, dtype=np.float64), lo, hi)
+
+@lru_cache(maxsize=128)
+def _widmark_factor_scalar(height, weight, sex):
+    # scalar memo for the simulation path, which keeps asking for the same
+    # (height, weight, sex) triple across runs
+    return float(calc_widmark_factor(height, weight, sex))
 
 def cumulative_absorption(drinks, absorption_halflife, start_time, end_time):
-    absorption_minutes = round((end_time - start_time) / 60)
-    t_sec = list(range(start_time, end_time, 60))
-    absorption_mat = [[0] * absorption_minutes for _ in range(max(len(drinks), 1))]
-    for i in range(len(drinks)):
-        absorption_mat[i] = [drinks["alc_kg"][i] * (1 - exp(-(t - drinks["time"][i]) * log(2) / absorption_halflife)) for t in t_sec]
-    absorption_mat = [[max(x, 0) for x in row] for row in absorption_mat]
-    kg_absorbed = [sum(row) for row in absorption_mat]
+    t_sec = np.arange(start_time, end_time, 60, dtype=np.int64)
+    alc_kg = np.asarray(drinks["alc_kg"], dtype=np.float64)
+    starts = np.asarray(drinks["time"], dtype=np.float64)
+    # scalar C-level log once per call, outside the drinks loop
+    k = math.log(2) / absorption_halflife
+    # accumulate drink by drink through one reused (n_minutes,) scratch row
+    # instead of materializing the (drinks x minutes) matrix; deltas are
+    # clamped before the exponential so negatives never enter expm1
+    kg_absorbed = np.zeros(len(t_sec))
+    scratch = np.empty(len(t_sec))
+    for alc, start in zip(alc_kg, starts):
+        np.subtract(t_sec, start, out=scratch)
+        np.maximum(scratch, 0.0, out=scratch)
+        scratch *= -k
+        np.expm1(scratch, out=scratch)
+        scratch *= alc
+        kg_absorbed -= scratch
     return {"kg_absorbed": kg_absorbed, "time": t_sec}
 
+def _accumulate_elimination(be, cap):
+    # e_i = e_{i-1} + min(be_i - e_{i-1}, cap) rewrites to
+    # e_i = min(be_i, e_{i-1} + cap); subtracting the ramp cap*i turns that
+    # into a running minimum, so the whole series is one minimum.accumulate
+    # instead of a per-sample Python loop (e_0 = e_1 = 0 as in the old loop)
+    ramp = cap * np.arange(len(be))
+    v = be - ramp
+    v[0] = 0.0
+    if len(v) > 1:
+        v[1] = -cap
+    return np.minimum.accumulate(v) + ramp
+
 def calc_bac_ts(drinks, height, weight, sex, absorption_halflife, beta, start_time, end_time):
     drinks["alc_vol"] = drinks["vol"] * drinks["alc_prop"]  # in litres
     drinks["alc_kg"] = drinks["alc_vol"] * 0.789  # 0.789 is the weight of one liter of alcohol
-    r = calc_widmark_factor(height, weight, sex)
-    
-    # "Starting" a data.frame time series to hold information about different aspects of
-    # the Blood Alcohol Concentration (bac)
-    bac_ts = cumulative_absorption(drinks, absorption_halflife, start_time, end_time)
-    bac_ts["time"] = pd.to_datetime(bac_ts["time"], origin="1970-01-01", tz="UTC")
-    
-    bac_ts["bac_excluding_elimination"] = bac_ts["kg_absorbed"] / (r * weight)
-    bac_ts["eliminated"] = [0] * len(bac_ts)
-    for i in range(2, len(bac_ts)):
-        current_bac = bac_ts["bac_excluding_elimination"][i] - bac_ts["eliminated"][i - 1]
-        bac_ts["eliminated"][i] = bac_ts["eliminated"][i - 1] + min(current_bac, beta * 60)  # We can't eliminate more bac than we got...
-    
-    bac_ts["bac"] = bac_ts["bac_excluding_elimination"] - bac_ts["eliminated"]
-    bac_ts["bac_perc"] = bac_ts["bac"] * 100
-    # Removing the end of the time series
-    ts_end_i = max(bac_ts[bac_ts["bac"] > 0].index, 5 * 60)
+    r = _widmark_factor_scalar(height, weight, sex)
+
+    absorption = cumulative_absorption(drinks, absorption_halflife, start_time, end_time)
+    be = absorption["kg_absorbed"] / (r * weight)
+    eliminated = _accumulate_elimination(be, beta * 60)  # We can't eliminate more bac than we got...
+    bac = be - eliminated
+
+    # a data.frame time series holding the different aspects of
+    # the Blood Alcohol Concentration (bac), assembled in one shot
+    bac_ts = pd.DataFrame({
+        # the int64 epoch-second grid converts without boxing a PyLong per sample
+        "time": pd.to_datetime(absorption["time"], unit="s", utc=True),
+        "kg_absorbed": absorption["kg_absorbed"],
+        "bac_excluding_elimination": be,
+        "eliminated": eliminated,
+        "bac": bac,
+        "bac_perc": bac * 100,
+    })
+    # Removing the end of the time series: cut after the last positive bac
+    # sample (keeping at least five hours), found with one C-level scan
+    # instead of a masked view plus max() over an Index
+    positive = np.nonzero(bac > 0)[0]
+    ts_end_i = max(int(positive[-1]) + 1 if positive.size else 0, 5 * 60)
     bac_ts = bac_ts.iloc[:ts_end_i, :]
     return bac_ts
 